@@ -1,111 +1,512 @@
-import requests
+import asyncio
+import aiohttp
+import atexit
+import glob
+import hashlib
+import logging
+import logging.handlers
+import orjson
+import os
+import queue
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 import time
-import threading
 import uuid
-from fastapi import FastAPI
-from fastapi.responses import HTMLResponse, FileResponse, JSONResponse
-from requests.adapters import HTTPAdapter
-from urllib3.util.retry import Retry
+import uvicorn
+import uvloop
+from aiolimiter import AsyncLimiter
+from collections import deque
+from contextlib import asynccontextmanager, suppress
+from itertools import islice
+from celery import Celery
+from celery.signals import worker_process_init
+from fastapi import FastAPI, Request
+from fastapi.responses import HTMLResponse, FileResponse, ORJSONResponse, Response, StreamingResponse
+from starlette.background import BackgroundTask
+from tenacity import AsyncRetrying, retry_if_exception, stop_after_attempt, wait_random_exponential
+from redis.asyncio import Redis
+
+# ==============================
+# LOGGING
+# ==============================
+# Records go through a queue and are written to stderr by a listener
+# thread, so fetch coroutines never block on the stream.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+
+log_queue = queue.SimpleQueue()
+log = logging.getLogger("sfda")
+log.setLevel(LOG_LEVEL)
+log.addHandler(logging.handlers.QueueHandler(log_queue))
+log.propagate = False
+
+
+def start_log_listener():
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(message)s"))
+    listener = logging.handlers.QueueListener(log_queue, handler)
+    listener.start()
+    atexit.register(listener.stop)
+
+
+start_log_listener()
+
+
+@worker_process_init.connect
+def restart_log_listener(**kwargs):
+    # Celery forks its pool after import, and the listener thread does
+    # not survive the fork.
+    start_log_listener()
 
 # ==============================
 # APP INIT
 # ==============================
-app = FastAPI(title="SFDA Drug Export Tool")
+@asynccontextmanager
+async def lifespan(app):
+    sweeper = asyncio.create_task(sweep_outputs())
+    yield
+    sweeper.cancel()
+    with suppress(asyncio.CancelledError):
+        await sweeper
+
+app = FastAPI(
+    title="SFDA Drug Export Tool",
+    default_response_class=ORJSONResponse,
+    lifespan=lifespan
+)
 
 BASE_URL = "https://www.sfda.gov.sa/GetDrugs.php?page="
 TOTAL_PAGES = 880
+PAGE_URLS = [f"{BASE_URL}{page}" for page in range(1, TOTAL_PAGES + 1)]
 
 # ==============================
-# IN-MEMORY JOB STORE (SINGLE CLIENT)
+# FETCH SETTINGS
 # ==============================
-jobs = {}
+MAX_CONCURRENCY = 16
+FETCH_WINDOW = 2 * MAX_CONCURRENCY
+RATE_LIMIT = 10
+RATE_PERIOD = 1.0
+MAX_RETRIES = 5
+RETRY_MAX_WAIT = 10
+RETRY_AFTER_MAX = 6 * RETRY_MAX_WAIT
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+KEEPALIVE_TIMEOUT = 60
+
+HEADERS = {
+    "User-Agent": "Mozilla/5.0 (SFDA Data Tool)",
+    "Accept-Encoding": "gzip, deflate",
+}
+
+# ==============================
+# TASK QUEUE + JOB STORE (CELERY + REDIS)
+# ==============================
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379/0")
+JOB_TTL = 86400
+
+celery_app = Celery("sfda", broker=REDIS_URL)
+redis_client = Redis.from_url(REDIS_URL, decode_responses=True)
+
+
+def new_job():
+    return {
+        "status": "queued",
+        "current_page": 0,
+        "total_pages": TOTAL_PAGES,
+        "message": "Job queued",
+        "file": None,
+        "last_updated": time.time()
+    }
+
+
+async def save_job(redis, job_id: str, fields, progress=0):
+    key = f"job:{job_id}"
+    mapping = {field: "" if value is None else value for field, value in fields.items()}
+    async with redis.pipeline(transaction=True) as pipe:
+        pipe.hset(key, mapping=mapping)
+        if progress:
+            # Incremented server-side: concurrent page updates can reach
+            # Redis out of order, so an absolute count could go backwards.
+            pipe.hincrby(key, "current_page", progress)
+        pipe.hincrby(key, "version", 1)
+        pipe.expire(key, JOB_TTL)
+        await pipe.execute()
+
+
+async def load_job(redis, job_id: str):
+    job = await redis.hgetall(f"job:{job_id}")
+    if not job:
+        return None
+    for field in ("current_page", "total_pages", "version"):
+        job[field] = int(job[field])
+    job["last_updated"] = float(job["last_updated"])
+    job["file"] = job["file"] or None
+    return job
 
 # ==============================
 # CORE FETCH FUNCTION
 # ==============================
-def fetch_sfda_data(job_id: str):
-    job = jobs[job_id]
-    job["status"] = "running"
-    job["message"] = "Initializing request session..."
-    job["last_updated"] = time.time()
+def retry_after_seconds(error):
+    value = (error.headers or {}).get("Retry-After", "")
+    return float(value) if value.isdigit() else None
+
+
+def is_retryable(error):
+    if isinstance(error, aiohttp.ClientResponseError):
+        return error.status in RETRY_STATUSES
+    return isinstance(error, (aiohttp.ClientError, asyncio.TimeoutError, orjson.JSONDecodeError))
+
+
+jittered_backoff = wait_random_exponential(multiplier=1, max=RETRY_MAX_WAIT)
+
+
+def is_throttled(error):
+    return isinstance(error, aiohttp.ClientResponseError) and error.status == 429
+
+
+def retry_wait(retry_state):
+    # Honour the server's Retry-After on 429 (capped, so one header cannot
+    # park a fetcher for an hour), otherwise back off with full jitter so
+    # concurrent fetchers do not retry in lockstep.
+    error = retry_state.outcome.exception()
+    if is_throttled(error):
+        retry_after = retry_after_seconds(error)
+        if retry_after:
+            return min(retry_after, RETRY_AFTER_MAX)
+    return jittered_backoff(retry_state)
+
+
+class PausableLimiter:
+    # AsyncLimiter shared by all fetchers of a job. A 429 on any request
+    # pauses every request behind it, not just the one that was throttled.
+
+    def __init__(self, rate, period):
+        self.limiter = AsyncLimiter(rate, period)
+        self.resume_at = 0.0
+
+    def pause(self, seconds):
+        self.resume_at = max(self.resume_at, time.monotonic() + seconds)
+
+    async def __aenter__(self):
+        while (delay := self.resume_at - time.monotonic()) > 0:
+            await asyncio.sleep(delay)
+        await self.limiter.acquire()
+
+    async def __aexit__(self, *exc_info):
+        pass
+
+
+async def try_publish(publish, **fields):
+    # Status updates are for the UI only; a Redis error here must not fail
+    # a page that was fetched (or is still retryable).
+    try:
+        await publish(**fields)
+    except Exception:
+        log.exception("Job status update failed")
+
+
+async def request_page(session, limiter, publish, page):
+    async def before_sleep(retry_state):
+        error = retry_state.outcome.exception()
+        if is_throttled(error):
+            limiter.pause(retry_state.next_action.sleep)
+        log.warning("RETRY page %d | attempt=%d | error=%s", page, retry_state.attempt_number, error)
+        await try_publish(publish, message=f"Retrying page {page}...")
+
+    async for attempt in AsyncRetrying(
+        stop=stop_after_attempt(MAX_RETRIES + 1),
+        wait=retry_wait,
+        retry=retry_if_exception(is_retryable),
+        before_sleep=before_sleep,
+        reraise=True,
+    ):
+        with attempt:
+            async with limiter:
+                async with session.get(PAGE_URLS[page - 1]) as response:
+                    response.raise_for_status()
+                    data = orjson.loads(await response.read())
+
+    return data["results"] if "results" in data else ()
+
+
+async def find_last_page(session, limiter, publish, probed):
+    # Binary search for the last non-empty page so the fetch does not pay
+    # for the empty pages between the real end and TOTAL_PAGES. Non-empty
+    # probe results are kept in probed so those pages are not requested
+    # again.
+    lo, hi = 0, TOTAL_PAGES
+    try:
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            results = await request_page(session, limiter, publish, mid)
+            if results:
+                probed[mid] = results
+                lo = mid
+            else:
+                hi = mid - 1
+    except Exception as e:
+        log.error("PROBE failed | error=%s", e)
+        return TOTAL_PAGES
+    return lo
+
+
+async def fetch_page(session, sem, limiter, job, publish, probed, page):
+    async with sem:
+        log.debug("START page %d", page)
+
+        results = probed.pop(page, None)
+        if results is None:
+            results = await request_page(session, limiter, publish, page)
+
+        total_done = job["current_page"] + 1
+        await try_publish(publish, progress=1)
+
+        log.debug("DONE page %d | total_done=%d", page, total_done)
+
+        return results
+
+
+def to_text(value):
+    if value is None or isinstance(value, str):
+        return value
+    if isinstance(value, (bool, dict, list)):
+        return orjson.dumps(value).decode()
+    return str(value)
+
+
+def column_array(values):
+    # Scalars keep their JSON type. Nested values, and columns that mix
+    # types within one page, are stored as text.
+    if any(isinstance(value, (dict, list)) for value in values):
+        return pa.array([to_text(value) for value in values], pa.string())
+    try:
+        return pa.array(values)
+    except (pa.ArrowInvalid, pa.ArrowTypeError, OverflowError):
+        return pa.array([to_text(value) for value in values], pa.string())
+
+
+def is_number(data_type):
+    return pa.types.is_integer(data_type) or pa.types.is_floating(data_type)
+
+
+def widen(current, incoming):
+    if current == incoming or pa.types.is_null(incoming):
+        return current
+    if pa.types.is_null(current):
+        return incoming
+    if is_number(current) and is_number(incoming):
+        return pa.float64()
+    return pa.string()
+
+
+def cast_column(array, data_type):
+    if array.type == data_type:
+        return array
+    if pa.types.is_string(data_type):
+        return pa.array([to_text(value) for value in array.to_pylist()], pa.string())
+    return array.cast(data_type)
+
+
+class ParquetPages:
+    # The SFDA feed is loosely typed PHP JSON, so a column's type can drift
+    # between pages (null then int, int then float, number then text). Each
+    # page keeps its native types and only a drifting column is widened.
+    # A Parquet file has a single schema, so a page that adds or widens
+    # columns starts a new part file.
+
+    def __init__(self, prefix):
+        self.prefix = prefix
+        self.parts = []
+        self.schema = None
+        self.writer = None
+
+    def write(self, records):
+        keys = dict.fromkeys(key for record in records for key in record)
+        arrays = {name: column_array([record.get(name) for record in records]) for name in keys}
+
+        types = dict(zip(self.schema.names, self.schema.types)) if self.schema else {}
+        for name, array in arrays.items():
+            types[name] = widen(types[name], array.type) if name in types else array.type
+        schema = pa.schema(list(types.items()))
+
+        if self.writer is None or schema != self.schema:
+            self.close()
+            self.schema = schema
+            path = f"{self.prefix}.{len(self.parts)}.parquet"
+            self.writer = pq.ParquetWriter(path, self.schema, compression="zstd")
+            self.parts.append(path)
+
+        columns = [
+            cast_column(arrays[name], data_type) if name in arrays else pa.nulls(len(records), data_type)
+            for name, data_type in types.items()
+        ]
+        self.writer.write_table(pa.Table.from_arrays(columns, schema=self.schema))
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.writer = None
+
+
+def export_excel(parts, file_name):
+    if parts:
+        # concat takes the union of the part columns, in first-seen order;
+        # values from earlier parts keep their own types.
+        frame = pd.concat([pd.read_parquet(path) for path in parts], ignore_index=True)
+    else:
+        frame = pd.DataFrame()
+    frame.to_excel(file_name, index=False, engine="xlsxwriter")
+    for path in parts:
+        os.remove(path)
+
+
+async def run_fetch(job_id: str, job, publish):
+    await publish(status="running", message="Initializing request session...")
 
     processed_pages = 0
     failed_pages = 0
-    all_data = []
-
-    session = requests.Session()
-    retries = Retry(
-        total=5,
-        connect=5,
-        read=5,
-        backoff_factor=2,
-        status_forcelist=[429, 500, 502, 503, 504],
-        allowed_methods=["GET"]
+    total_records = 0
+
+    file_name = f"SFDA_Drugs_{job_id}.xlsx"
+    writer = ParquetPages(f"SFDA_Drugs_{job_id}")
+
+    connector = aiohttp.TCPConnector(
+        limit=MAX_CONCURRENCY,
+        limit_per_host=MAX_CONCURRENCY,
+        ttl_dns_cache=300,
+        keepalive_timeout=KEEPALIVE_TIMEOUT,
     )
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    timeout = aiohttp.ClientTimeout(total=30)
+    sem = asyncio.Semaphore(MAX_CONCURRENCY)
+    limiter = PausableLimiter(RATE_LIMIT, RATE_PERIOD)
+
+    async with aiohttp.ClientSession(
+        connector=connector, timeout=timeout, headers=HEADERS
+    ) as session:
+        probed = {}
+        last_page = await find_last_page(session, limiter, publish, probed)
+        log.info("Last non-empty page: %d", last_page)
+        await publish(total_pages=last_page, message=f"Found {last_page} pages to fetch")
+
+        pages = iter(range(1, last_page + 1))
+        pending = deque()
+
+        def schedule():
+            for page in islice(pages, FETCH_WINDOW - len(pending)):
+                task = asyncio.create_task(fetch_page(session, sem, limiter, job, publish, probed, page))
+                pending.append((page, task))
 
-    headers = {"User-Agent": "Mozilla/5.0 (SFDA Data Tool)"}
+        try:
+            # Pages are written in page order. Only FETCH_WINDOW pages are in
+            # flight ahead of the write cursor, so a page stuck in retries
+            # cannot pile the rest of the dataset up in memory.
+            schedule()
+            while pending:
+                page, task = pending.popleft()
+                schedule()
+                try:
+                    results = await task
+                except Exception as e:
+                    failed_pages += 1
+                    log.error("FAILED page %d | error=%s", page, e)
+                    continue
+                if not results:
+                    continue
+
+                try:
+                    await asyncio.to_thread(writer.write, results)
+                except Exception as e:
+                    failed_pages += 1
+                    log.error("FAILED writing page %d | error=%s", page, e)
+                    continue
+
+                processed_pages += 1
+                total_records += len(results)
+        finally:
+            for _, task in pending:
+                task.cancel()
+            # Let cancelled requests unwind before the session closes their
+            # connections, and retrieve any exceptions they already hold.
+            await asyncio.gather(*(task for _, task in pending), return_exceptions=True)
+            await asyncio.to_thread(writer.close)
+
+    await asyncio.to_thread(export_excel, writer.parts, file_name)
+
+    log.info(
+        "SUMMARY job=%s | pages_processed=%d | pages_failed=%d | records=%d",
+        job_id, processed_pages, failed_pages, total_records
+    )
 
-    for page in range(1, TOTAL_PAGES + 1):
-        print(f"[BACKEND] ▶ START page {page}")
+    await publish(status="completed", file=file_name, message="Completed successfully")
 
-        job["current_page"] = page
-        job["message"] = f"Fetching page {page} of {TOTAL_PAGES}"
-        job["last_updated"] = time.time()
 
-        try:
-            response = session.get(
-                f"{BASE_URL}{page}",
-                headers=headers,
-                timeout=30
-            )
-            response.raise_for_status()
-
-            data = response.json()
-            results = data.get("results", [])
-
-            if not results:
-                print(f"[BACKEND] ⛔ No results at page {page}, stopping.")
-                break
+async def run_job(job_id: str):
+    # The worker runs each job under its own event loop, so it needs its
+    # own Redis client rather than the API's module-level one.
+    redis = Redis.from_url(REDIS_URL, decode_responses=True)
+    job = new_job()
 
-            all_data.extend(results)
-            processed_pages += 1
+    # Applies a batch of field changes locally and sends only those fields
+    # to Redis, so each update costs a single round-trip.
+    def publish(progress=0, **fields):
+        fields["last_updated"] = time.time()
+        job.update(fields)
+        job["current_page"] += progress
+        return save_job(redis, job_id, fields, progress)
 
-            print(f"[BACKEND] ✅ DONE page {page} | total_done={processed_pages}")
+    try:
+        await run_fetch(job_id, job, publish)
+    except Exception as e:
+        await publish(status="failed", message=f"Job failed: {e}")
+        raise
+    finally:
+        await redis.aclose()
 
-            time.sleep(1.2)
 
-        except Exception as e:
-            failed_pages += 1
-            print(f"[BACKEND] ❌ FAILED page {page} | error={e}")
-            job["message"] = f"Retrying page {page}..."
-            time.sleep(3)
-            continue
+@celery_app.task(ignore_result=True)
+def fetch_sfda_data(job_id: str):
+    uvloop.run(run_job(job_id))
 
-    file_name = f"SFDA_Drugs_{job_id}.xlsx"
-    pd.DataFrame(all_data).to_excel(file_name, index=False)
+# ==============================
+# OUTPUT FILE CLEANUP
+# ==============================
+SWEEP_INTERVAL = 3600
+
+
+def remove_stale_outputs():
+    cutoff = time.time() - JOB_TTL
+    for path in glob.glob("SFDA_Drugs_*.xlsx") + glob.glob("SFDA_Drugs_*.parquet"):
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+                log.info("Removed stale output %s", path)
+        except FileNotFoundError:
+            pass
+
+
+async def sweep_outputs():
+    while True:
+        # Every uvicorn worker runs this loop; the lock lets only one of
+        # them sweep per interval.
+        try:
+            if await redis_client.set("sweep:lock", os.getpid(), nx=True, ex=SWEEP_INTERVAL):
+                await asyncio.to_thread(remove_stale_outputs)
+        except Exception:
+            log.exception("Output sweep failed")
+        await asyncio.sleep(SWEEP_INTERVAL)
 
-    print("=================================")
-    print(f"[SUMMARY] Pages processed successfully: {processed_pages}")
-    print(f"[SUMMARY] Pages failed/retried: {failed_pages}")
-    print(f"[SUMMARY] Total records collected: {len(all_data)}")
-    print("=================================")
 
-    job["status"] = "completed"
-    job["file"] = file_name
-    job["message"] = "Completed successfully"
-    job["last_updated"] = time.time()
+async def cleanup_job(job_id: str, path: str):
+    try:
+        await asyncio.to_thread(os.remove, path)
+    except FileNotFoundError:
+        pass
+    await redis_client.delete(f"job:{job_id}")
 
 # ==============================
 # ROUTES
 # ==============================
 
-@app.get("/", response_class=HTMLResponse)
-def home():
-    return """
+HOME_HTML = """
 <!DOCTYPE html>
 <html>
 <head>
@@ -181,6 +582,7 @@ def home():
 <script>
 let jobId = null;
 let lastMessage = "";
+let lastPage = 0;
 let alarmPlayed = false;
 const terminal = document.getElementById("terminal");
 
@@ -212,84 +614,138 @@ function startJob() {
     .then(d => {
       jobId = d.job_id;
       log("JOB ID: " + jobId);
-      poll();
+      listen();
     });
 }
 
-function poll() {
-  fetch(`/status/${jobId}`)
-    .then(r => r.json())
-    .then(d => {
-      const percent = Math.floor((d.current_page / d.total_pages) * 100);
-      document.getElementById("bar").style.width = percent + "%";
-      document.getElementById("percent").innerText = percent + "%";
-      document.getElementById("page").innerText = d.current_page;
-
-      if (d.message && d.message !== lastMessage) {
-        log(d.message);
-        lastMessage = d.message;
-      }
+function listen() {
+  const src = new EventSource("/events/" + jobId);
+  src.onmessage = e => {
+    const d = JSON.parse(e.data);
+    if (d.error) {
+      log(d.error);
+      src.close();
+      return;
+    }
 
-      if (Math.random() > 0.75) {
-        log(phaseLogs[Math.floor(Math.random() * phaseLogs.length)]);
-      }
+    if (d.status === "failed") {
+      src.close();
+      log(d.message);
+      log("OPERATION FAILED");
+      return;
+    }
 
-      if (d.status === "completed") {
-        log("OPERATION COMPLETE");
-        log("PAYLOAD READY");
+    const percent = d.total_pages ? Math.floor((d.current_page / d.total_pages) * 100) : 0;
+    document.getElementById("bar").style.width = percent + "%";
+    document.getElementById("percent").innerText = percent + "%";
+    document.getElementById("page").innerText = d.current_page;
 
-        if (!alarmPlayed) {
-          const alarm = document.getElementById("alarm");
-          alarm.loop = true;
-          alarm.volume = 1.0;
-          alarm.play();
-          alarmPlayed = true;
+    if (d.current_page !== lastPage) {
+      log(`Fetched ${d.current_page} of ${d.total_pages} pages`);
+      lastPage = d.current_page;
+    }
 
-          setTimeout(() => {
-            alarm.loop = false;
-            alarm.pause();
-            alarm.currentTime = 0;
-          }, 15000);
-        }
+    if (d.message && d.message !== lastMessage) {
+      log(d.message);
+      lastMessage = d.message;
+    }
+
+    if (Math.random() > 0.75) {
+      log(phaseLogs[Math.floor(Math.random() * phaseLogs.length)]);
+    }
+
+    if (d.status === "completed") {
+      src.close();
+      log("OPERATION COMPLETE");
+      log("PAYLOAD READY");
+
+      if (!alarmPlayed) {
+        const alarm = document.getElementById("alarm");
+        alarm.loop = true;
+        alarm.volume = 1.0;
+        alarm.play();
+        alarmPlayed = true;
 
         setTimeout(() => {
-          window.location.href = `/download/${jobId}`;
-        }, 3000);
-      } else {
-        setTimeout(poll, 1000);
+          alarm.loop = false;
+          alarm.pause();
+          alarm.currentTime = 0;
+        }, 15000);
       }
-    });
+
+      setTimeout(() => {
+        window.location.href = `/download/${jobId}`;
+      }, 3000);
+    }
+  };
 }
 </script>
 </body>
 </html>
 """
 
+HOME_ETAG = f'"{hashlib.md5(HOME_HTML.encode()).hexdigest()}"'
+HOME_HEADERS = {"ETag": HOME_ETAG, "Cache-Control": "public, max-age=3600"}
+
+@app.get("/", response_class=HTMLResponse)
+async def home(request: Request):
+    if request.headers.get("if-none-match") == HOME_ETAG:
+        return Response(status_code=304, headers=HOME_HEADERS)
+    return HTMLResponse(HOME_HTML, headers=HOME_HEADERS)
+
 @app.get("/start")
-def start_job():
+async def start_job():
     job_id = str(uuid.uuid4())
-    jobs[job_id] = {
-        "status": "queued",
-        "current_page": 0,
-        "total_pages": TOTAL_PAGES,
-        "message": "Job queued",
-        "file": None,
-        "last_updated": time.time()
-    }
-    threading.Thread(target=fetch_sfda_data, args=(job_id,)).start()
+    await save_job(redis_client, job_id, new_job())
+    await asyncio.to_thread(fetch_sfda_data.delay, job_id)
     return {"job_id": job_id}
 
 @app.get("/status/{job_id}")
-def job_status(job_id: str):
-    return jobs.get(job_id, {"error": "Invalid job id"})
+async def job_status(job_id: str):
+    job = await load_job(redis_client, job_id)
+    return job or {"error": "Invalid job id"}
 
 @app.get("/download/{job_id}")
-def download(job_id: str):
-    job = jobs.get(job_id)
+async def download(job_id: str):
+    job = await load_job(redis_client, job_id)
     if not job or job["status"] != "completed":
-        return JSONResponse({"error": "File not ready"})
+        return ORJSONResponse({"error": "File not ready"})
+    try:
+        stat_result = await asyncio.to_thread(os.stat, job["file"])
+    except FileNotFoundError:
+        return ORJSONResponse({"error": "File expired"})
     return FileResponse(
         job["file"],
+        stat_result=stat_result,
         filename="SFDA_Drugs_List.xlsx",
-        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        media_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+        background=BackgroundTask(cleanup_job, job_id, job["file"])
+    )
+
+async def event_gen(job_id: str):
+    last_version = None
+    while True:
+        job = await load_job(redis_client, job_id)
+        if not job:
+            yield b"data: " + orjson.dumps({"error": "Invalid job id"}) + b"\n\n"
+            return
+        if job["version"] != last_version:
+            last_version = job["version"]
+            yield b"data: " + orjson.dumps(job) + b"\n\n"
+            if job["status"] in ("completed", "failed"):
+                break
+        await asyncio.sleep(0.2)
+
+@app.get("/events/{job_id}")
+async def job_events(job_id: str):
+    return StreamingResponse(event_gen(job_id), media_type="text/event-stream")
+
+if __name__ == "__main__":
+    uvicorn.run(
+        "main:app",
+        host="0.0.0.0",
+        port=8000,
+        workers=int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1)),
+        loop="uvloop",
+        http="httptools"
     )
@@ -0,0 +1,205 @@
+import asyncio
+from types import SimpleNamespace
+
+import aiohttp
+import fakeredis
+import openpyxl
+import pandas as pd
+
+import main
+
+
+def fake_request_page(non_empty, calls=None):
+    async def request_page(session, limiter, publish, page):
+        if calls is not None:
+            calls.append(page)
+        return [{"page": page}] if page in non_empty else ()
+    return request_page
+
+
+async def no_publish(**fields):
+    pass
+
+
+# ==============================
+# LAST PAGE PROBE
+# ==============================
+
+def test_find_last_page_finds_boundary(monkeypatch):
+    monkeypatch.setattr(main, "request_page", fake_request_page(range(1, 601)))
+    probed = {}
+
+    last_page = asyncio.run(main.find_last_page(None, None, no_publish, probed))
+
+    assert last_page == 600
+    assert probed and all(page <= 600 for page in probed)
+    assert probed[600] == [{"page": 600}]
+
+
+def test_find_last_page_all_empty(monkeypatch):
+    monkeypatch.setattr(main, "request_page", fake_request_page(()))
+    probed = {}
+
+    assert asyncio.run(main.find_last_page(None, None, no_publish, probed)) == 0
+    assert probed == {}
+
+
+def test_find_last_page_falls_back_on_probe_failure(monkeypatch):
+    async def request_page(session, limiter, publish, page):
+        raise aiohttp.ClientError("boom")
+
+    monkeypatch.setattr(main, "request_page", request_page)
+
+    assert asyncio.run(main.find_last_page(None, None, no_publish, {})) == main.TOTAL_PAGES
+
+
+# ==============================
+# PAGE FETCH
+# ==============================
+
+def run_fetch_page(page, probed, publish=no_publish):
+    job = {"current_page": 0}
+    return asyncio.run(
+        main.fetch_page(None, asyncio.Semaphore(1), None, job, publish, probed, page)
+    )
+
+
+def test_fetch_page_reuses_probed_results(monkeypatch):
+    calls = []
+    monkeypatch.setattr(main, "request_page", fake_request_page(range(1, 10), calls))
+    probed = {5: [{"page": "cached"}]}
+
+    assert run_fetch_page(5, probed) == [{"page": "cached"}]
+    assert run_fetch_page(6, probed) == [{"page": 6}]
+    assert calls == [6]
+    assert probed == {}
+
+
+def test_fetch_page_keeps_results_when_progress_update_fails(monkeypatch):
+    monkeypatch.setattr(main, "request_page", fake_request_page({3}))
+
+    async def publish(**fields):
+        raise ConnectionError("redis down")
+
+    assert run_fetch_page(3, {}, publish) == [{"page": 3}]
+
+
+# ==============================
+# JOB STORE
+# ==============================
+
+def test_save_and_load_job_round_trip():
+    async def scenario():
+        redis = fakeredis.FakeAsyncRedis(decode_responses=True)
+        await main.save_job(redis, "abc", main.new_job())
+        await main.save_job(redis, "abc", {"status": "running"}, progress=1)
+        await main.save_job(redis, "abc", {"last_updated": 2.5}, progress=1)
+        stored = await redis.hget("job:abc", "file")
+        ttl = await redis.ttl("job:abc")
+        return stored, ttl, await main.load_job(redis, "abc"), await main.load_job(redis, "missing")
+
+    stored, ttl, job, missing = asyncio.run(scenario())
+
+    assert stored == ""
+    assert 0 < ttl <= main.JOB_TTL
+    assert job["file"] is None
+    assert job["status"] == "running"
+    assert job["current_page"] == 2
+    assert job["total_pages"] == main.TOTAL_PAGES
+    assert job["version"] == 3
+    assert job["last_updated"] == 2.5
+    assert missing is None
+
+
+# ==============================
+# RETRY WAIT
+# ==============================
+
+def retry_state(error, attempt_number=1):
+    outcome = SimpleNamespace(exception=lambda: error)
+    return SimpleNamespace(outcome=outcome, attempt_number=attempt_number)
+
+
+def response_error(status, headers=None):
+    return aiohttp.ClientResponseError(None, (), status=status, headers=headers)
+
+
+def test_retry_wait_uses_retry_after():
+    assert main.retry_wait(retry_state(response_error(429, {"Retry-After": "5"}))) == 5
+
+
+def test_retry_wait_caps_retry_after():
+    error = response_error(429, {"Retry-After": "3600"})
+    assert main.retry_wait(retry_state(error)) == main.RETRY_AFTER_MAX
+
+
+def test_retry_wait_backs_off_with_jitter_otherwise():
+    for error in (response_error(503), response_error(429), asyncio.TimeoutError()):
+        for attempt_number in range(1, 8):
+            delay = main.retry_wait(retry_state(error, attempt_number))
+            assert 0 <= delay <= main.RETRY_MAX_WAIT
+
+
+# ==============================
+# PARQUET PAGES + EXCEL EXPORT
+# ==============================
+
+def write_pages(pages):
+    writer = main.ParquetPages("SFDA_Drugs_test")
+    for records in pages:
+        writer.write(records)
+    writer.close()
+    return writer
+
+
+def test_numeric_values_export_as_numeric_cells(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = write_pages([[{"name": "A", "price": 10, "rate": 1.5, "active": True}]])
+
+    main.export_excel(writer.parts, "out.xlsx")
+
+    sheet = openpyxl.load_workbook("out.xlsx").active
+    assert [cell.value for cell in sheet[1]] == ["name", "price", "rate", "active"]
+    assert [cell.value for cell in sheet[2]] == ["A", 10, 1.5, True]
+    assert not list(tmp_path.glob("*.parquet"))
+
+
+def test_new_columns_start_a_new_part(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = write_pages([
+        [{"name": "A"}],
+        [{"name": "B"}],
+        [{"name": "C", "price": 3}],
+    ])
+
+    assert len(writer.parts) == 2
+    frame = pd.concat([pd.read_parquet(path) for path in writer.parts], ignore_index=True)
+    assert list(frame.columns) == ["name", "price"]
+    assert frame["name"].tolist() == ["A", "B", "C"]
+    assert pd.isna(frame["price"][0]) and frame["price"][2] == 3
+
+
+def test_drifting_columns_are_widened(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = write_pages([
+        [{"price": 10, "code": None, "note": 1}],
+        [{"price": 10.5, "code": 7, "note": "n/a"}],
+    ])
+
+    assert writer.schema.field("price").type == "double"
+    assert writer.schema.field("code").type == "int64"
+    assert writer.schema.field("note").type == "string"
+
+    main.export_excel(writer.parts, "out.xlsx")
+    sheet = openpyxl.load_workbook("out.xlsx").active
+    assert [cell.value for cell in sheet[2]] == [10, None, 1]
+    assert [cell.value for cell in sheet[3]] == [10.5, 7, "n/a"]
+
+
+def test_mixed_and_nested_values_are_stored_as_text(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    writer = write_pages([[{"mixed": 1, "nested": {"a": 1}}, {"mixed": "x", "nested": [1]}]])
+
+    table = pd.read_parquet(writer.parts[0])
+    assert table["mixed"].tolist() == ["1", "x"]
+    assert table["nested"].tolist() == ['{"a":1}', "[1]"]